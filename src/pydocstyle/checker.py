@@ -31,7 +31,6 @@ from .utils import (
     pairwise,
     strip_non_alphanumeric,
 )
-from .wordlists import IMPERATIVE_BLACKLIST, IMPERATIVE_VERBS, stem
 
 __all__ = ('check',)
 
@@ -542,6 +541,14 @@ class ConventionChecker:
         ):
             stripped = ast.literal_eval(docstring).strip()
             if stripped:
+                # Loading the wordlists pulls in the stemmer, so defer it
+                # until the check actually has a word to look up.
+                from .wordlists import (
+                    IMPERATIVE_BLACKLIST,
+                    IMPERATIVE_VERBS,
+                    stem,
+                )
+
                 first_word = strip_non_alphanumeric(stripped.split()[0])
                 check_word = first_word.lower()
 
@@ -8,12 +8,12 @@ import sys
 from collections import namedtuple
 from collections.abc import Set
 from configparser import NoOptionError, NoSectionError, RawConfigParser
-from functools import reduce
+from functools import lru_cache, reduce
 from re import compile as re
 
 from ._version import __version__
 from .utils import log
-from .violations import ErrorRegistry, conventions
+from .violations import all_errors, codes_by_prefix, conventions
 
 if sys.version_info >= (3, 11):
     import tomllib
@@ -35,6 +35,23 @@ def check_initialized(method):
     return _decorator
 
 
+_is_literal_pattern = re(r'[\w/-]+').fullmatch
+
+
+@lru_cache(maxsize=64)
+def _compile_match(pattern):
+    """Return a function matching whole names against the `pattern` regex.
+
+    Patterns made only of plain name characters (e.g. `match=setup`) are
+    compared directly. Anything else, including a `.` which is a wildcard,
+    goes through the regex engine.
+
+    """
+    if _is_literal_pattern(pattern):
+        return pattern.__eq__
+    return re(pattern + '$').match
+
+
 class TomlParser:
     """ConfigParser that partially mimics RawConfigParser but for toml files.
 
@@ -215,6 +232,7 @@ class ConfigurationParser:
     def __init__(self):
         """Create a configuration parser."""
         self._cache = {}
+        self._config_file_parsers = {}
         self._override_by_cli = None
         self._options = self._arguments = self._run_conf = None
         self._parser = self._create_option_parser()
@@ -266,8 +284,8 @@ class ConfigurationParser:
 
         def _get_matches(conf):
             """Return the `match` and `match_dir` functions for `config`."""
-            match_func = re(conf.match + '$').match
-            match_dir_func = re(conf.match_dir + '$').match
+            match_func = _compile_match(conf.match)
+            match_dir_func = _compile_match(conf.match_dir)
             return match_func, match_dir_func
 
         def _get_ignore_decorators(conf):
@@ -284,38 +302,66 @@ class ConfigurationParser:
                 else None
             )
 
-        for name in self._arguments:
-            if os.path.isdir(name):
-                for root, dirs, filenames in os.walk(name):
-                    config = self._get_config(os.path.abspath(root))
-                    match, match_dir = _get_matches(config)
-                    ignore_decorators = _get_ignore_decorators(config)
-                    property_decorators = _get_property_decorators(config)
+        def _walk(root):
+            """Yield the checked files under `root`, pruning by `match_dir`.
+
+            Like `os.walk`, unreadable directories are skipped and symlinked
+            directories are not followed.
 
+            """
+            try:
+                with os.scandir(root) as it:
+                    entries = list(it)
+            except OSError:
+                return
+
+            config = self._get_config(os.path.abspath(root))
+            match, match_dir = _get_matches(config)
+            ignore_decorators = _get_ignore_decorators(config)
+            property_decorators = _get_property_decorators(config)
+
+            subdirs = []
+            for entry in entries:
+                # As in `os.walk`, an entry that can't be stat'ed (e.g. a
+                # symlink loop) is not a directory.
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    try:
+                        is_symlink = entry.is_symlink()
+                    except OSError:
+                        is_symlink = False
                     # Skip any dirs that do not match match_dir
-                    dirs[:] = [d for d in dirs if match_dir(d)]
-
-                    for filename in map(os.path.basename, filenames):
-                        if match(filename):
-                            full_path = os.path.join(root, filename)
-                            yield (
-                                full_path,
-                                list(config.checked_codes),
-                                ignore_decorators,
-                                property_decorators,
-                                config.ignore_self_only_init,
-                            )
+                    if not is_symlink and match_dir(entry.name):
+                        subdirs.append(entry.path)
+                elif match(entry.name):
+                    yield (
+                        entry.path,
+                        list(config.checked_codes),
+                        ignore_decorators,
+                        property_decorators,
+                        config.ignore_self_only_init,
+                    )
+
+            for subdir in subdirs:
+                yield from _walk(subdir)
+
+        for name in self._arguments:
+            if os.path.isdir(name):
+                yield from _walk(name)
             else:
+                # An explicit file is checked on its own, without walking
+                # its directory; only its basename has to `match`.
                 config = self._get_config(os.path.abspath(name))
-                match, _ = _get_matches(config)
-                ignore_decorators = _get_ignore_decorators(config)
-                property_decorators = _get_property_decorators(config)
-                if match(os.path.basename(name)):
+                if _compile_match(config.match)(os.path.basename(name)):
                     yield (
                         name,
                         list(config.checked_codes),
-                        ignore_decorators,
-                        property_decorators,
+                        _get_ignore_decorators(config),
+                        _get_property_decorators(config),
                         config.ignore_self_only_init,
                     )
 
@@ -449,19 +495,12 @@ class ConfigurationParser:
         Returns (options, should_inherit).
 
         """
-        if path.endswith('.toml'):
-            parser = TomlParser()
-        else:
-            parser = RawConfigParser(inline_comment_prefixes=('#', ';'))
+        parser = self._get_config_file_parser(path)
         options = None
         should_inherit = True
 
-        if parser.read(path) and self._get_section_name(parser):
-            all_options = self._parser.option_list[:]
-            for group in self._parser.option_groups:
-                all_options.extend(group.option_list)
-
-            option_list = {o.dest: o.type or o.action for o in all_options}
+        if parser is not None and self._get_section_name(parser):
+            option_list = self._get_option_types()
 
             # First, read the default values
             new_options, _ = self._parse_args([])
@@ -580,8 +619,28 @@ class ConfigurationParser:
 
         return None
 
-    @classmethod
-    def _get_config_file_in_folder(cls, path):
+    def _get_config_file_parser(self, path):
+        """Return a parser which has read the configuration file `path`.
+
+        Returns None if the file could not be read. Every file is parsed
+        only once, as it is usually needed both to discover it and to read
+        its options.
+
+        """
+        if path in self._config_file_parsers:
+            return self._config_file_parsers[path]
+
+        if path.endswith('.toml'):
+            parser = TomlParser()
+        else:
+            parser = RawConfigParser(inline_comment_prefixes=('#', ';'))
+        if not parser.read(path):
+            parser = None
+
+        self._config_file_parsers[path] = parser
+        return parser
+
+    def _get_config_file_in_folder(self, path):
         """Look for a configuration file in `path`.
 
         If exists return its full path, otherwise None.
@@ -590,24 +649,31 @@ class ConfigurationParser:
         if os.path.isfile(path):
             path = os.path.dirname(path)
 
-        for fn in cls.PROJECT_CONFIG_FILES:
-            if fn.endswith('.toml'):
-                config = TomlParser()
-            else:
-                config = RawConfigParser(inline_comment_prefixes=('#', ';'))
+        # List the folder once instead of trying to open every candidate.
+        # If it can't be listed, fall back to trying them all. Names are
+        # compared case-insensitively, as the file system may be; reading
+        # the file is what decides whether it is there.
+        try:
+            names = {name.lower() for name in os.listdir(path)}
+        except OSError:
+            names = None
+
+        for fn in self.PROJECT_CONFIG_FILES:
+            if names is not None and fn.lower() not in names:
+                continue
             full_path = os.path.join(path, fn)
-            if config.read(full_path) and cls._get_section_name(config):
+            parser = self._get_config_file_parser(full_path)
+            if parser is not None and self._get_section_name(parser):
                 return full_path
 
     @classmethod
     def _get_exclusive_error_codes(cls, options):
         """Extract the error codes from the selected exclusive option."""
-        codes = set(ErrorRegistry.get_error_codes())
         checked_codes = None
 
         if options.ignore is not None:
             ignored = cls._expand_error_codes(options.ignore)
-            checked_codes = codes - ignored
+            checked_codes = all_errors - ignored
         elif options.select is not None:
             checked_codes = cls._expand_error_codes(options.select)
         elif options.convention is not None:
@@ -625,7 +691,6 @@ class ConfigurationParser:
     @staticmethod
     def _expand_error_codes(code_parts):
         """Return an expanded set of error codes to ignore."""
-        codes = set(ErrorRegistry.get_error_codes())
         expanded_codes = set()
 
         try:
@@ -636,9 +701,7 @@ class ConfigurationParser:
                 if not part:
                     continue
 
-                codes_to_add = {
-                    code for code in codes if code.startswith(part)
-                }
+                codes_to_add = codes_by_prefix.get(part, frozenset())
                 if not codes_to_add:
                     log.warning(
                         'Error code passed is not a prefix of any '
@@ -656,7 +719,8 @@ class ConfigurationParser:
         """Extract the codes needed to be checked from `options`."""
         checked_codes = cls._get_exclusive_error_codes(options)
         if checked_codes is None:
-            checked_codes = cls.DEFAULT_CONVENTION
+            # Copy the default convention so the add options won't alter it.
+            checked_codes = copy.deepcopy(cls.DEFAULT_CONVENTION)
 
         cls._set_add_options(checked_codes, options)
 
@@ -737,8 +801,25 @@ class ConfigurationParser:
         return options
 
     @classmethod
+    @lru_cache(maxsize=None)
+    def _get_option_types(cls):
+        """Return a mapping of option destinations to their types/actions."""
+        parser = cls._create_option_parser()
+        all_options = parser.option_list[:]
+        for group in parser.option_groups:
+            all_options.extend(group.option_list)
+
+        return {o.dest: o.type or o.action for o in all_options}
+
+    @classmethod
+    @lru_cache(maxsize=None)
     def _create_option_parser(cls):
-        """Return an option parser to parse the command line arguments."""
+        """Return an option parser to parse the command line arguments.
+
+        The parser holds no state between calls to `parse_args`, so it is
+        built only once and shared by all the instances of this class.
+
+        """
         from optparse import OptionGroup, OptionParser
 
         parser = OptionParser(
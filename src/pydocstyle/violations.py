@@ -3,7 +3,16 @@
 from collections import namedtuple
 from functools import partial
 from itertools import dropwhile
-from typing import Any, Callable, Iterable, List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+)
 
 from .parser import Definition
 from .utils import is_blank
@@ -426,8 +435,20 @@ class AttrDict(dict):
         return self[item]
 
 
+def _index_by_prefix(codes: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+    """Map every prefix of each of `codes` to the codes starting with it."""
+    index = {}  # type: Dict[str, Set[str]]
+    for code in codes:
+        for end in range(1, len(code) + 1):
+            index.setdefault(code[:end], set()).add(code)
+    return {prefix: frozenset(group) for prefix, group in index.items()}
+
+
 all_errors = set(ErrorRegistry.get_error_codes())
 
+#: Registered error codes by prefix, e.g. 'D10' -> {'D100', ..., 'D107'}
+codes_by_prefix = _index_by_prefix(all_errors)
+
 
 conventions = AttrDict(
     {
@@ -0,0 +1,32 @@
+"""Unit test for pydocstyle configuration.
+
+Use tox or pytest to run the test suite.
+"""
+import re
+
+import pytest
+
+from pydocstyle import config
+
+
+__all__ = ()
+
+
+@pytest.mark.parametrize('pattern, name, expected', [
+    # Regex patterns go through the regex engine.
+    (r'(?!test_).*\.py', 'a.py', True),
+    (r'(?!test_).*\.py', 'test_a.py', False),
+    # Literals without a '.' are compared directly.
+    ('A', 'A', True),
+    ('A', 'AB', False),
+    ('A', 'a', False),
+    # A '.' is a wildcard, so dotted patterns are regexes too.
+    ('a.py', 'a.py', True),
+    ('a.py', 'aXpy', True),
+    ('a.py', 'b.py', False),
+    ('a.py', 'a.pyc', False),
+])
+def test_compile_match(pattern, name, expected):
+    """Test that match patterns behave like the equivalent regex."""
+    assert bool(config._compile_match(pattern)(name)) is expected
+    assert bool(re.match(pattern + '$', name)) is expected
@@ -1,9 +1,15 @@
-"""Use tox or pytest to run the test-suite."""
+"""Use tox or pytest to run the test-suite.
+
+The tests are independent of each other, so they can also be distributed
+over all cores with pytest-xdist: `pytest -n auto src/tests`.
+"""
 
 from collections import namedtuple
+from contextlib import redirect_stderr, redirect_stdout
 
+import io
 import os
-import shlex
+import re
 import shutil
 import pytest
 import pathlib
@@ -12,13 +18,49 @@ import textwrap
 import subprocess
 import sys
 
-from unittest import mock
+import pydocstyle
+from pydocstyle import checker, cli, utils, violations
 
-from pydocstyle import checker, violations
+if sys.version_info[:2] >= (3, 8):
+    from importlib import metadata
+else:
+    import importlib_metadata as metadata
 
 
 __all__ = ()
 
+# Prefer a memory backed filesystem for the sandboxes when there is one.
+SANDBOX_BASE_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Example modules shared by many tests, written without `textwrap.dedent`.
+_EXAMPLE_FUNC_NO_DOCSTRING = (
+    'def foo():\n'
+    '    pass\n'
+)
+_EXAMPLE_CLASS_WITH_DOCSTRING = (
+    'class Foo(object):\n'
+    '    "Doc string"\n'
+    '    def foo():\n'
+    '        pass\n'
+)
+_EXAMPLE_CLASS_NO_DOCSTRINGS = (
+    'class Foo(object):\n'
+    '    def foo():\n'
+    '        pass\n'
+)
+
+
+def split_args(args):
+    """Split a command line string into arguments.
+
+    Windows paths are full of backslashes, which are escape characters in
+    POSIX mode, so the non-POSIX rules are used on Windows.
+
+    """
+    import shlex
+
+    return shlex.split(args, posix=os.name != 'nt')
+
 
 class SandboxEnv:
     """An isolated environment where pydocstyle can be run.
@@ -30,6 +72,10 @@ class SandboxEnv:
 
     """
 
+    __slots__ = (
+        'tempdir', 'base_dir', 'script_name', 'section_name', 'config_name',
+    )
+
     Result = namedtuple('Result', ('out', 'err', 'code'))
 
     def __init__(
@@ -37,9 +83,19 @@ class SandboxEnv:
         script_name='pydocstyle',
         section_name='pydocstyle',
         config_name='tox.ini',
+        base_dir=None,
     ):
-        """Initialize the object."""
+        """Initialize the object.
+
+        The environment is created in a new temporary directory inside
+        `base_dir`, or in the default temporary directory if it is None.
+        Only in the latter case is the environment isolated from other config
+        files and removed on exit; otherwise both are left to the owner of
+        `base_dir`.
+
+        """
         self.tempdir = None
+        self.base_dir = base_dir
         self.script_name = script_name
         self.section_name = section_name
         self.config_name = config_name
@@ -49,6 +105,7 @@ class SandboxEnv:
 
         Applies changes to `tox.ini` relative to `tempdir/prefix`.
         If the given path prefix does not exist it is created.
+        Options given as None are left out of the file.
 
         """
         base = os.path.join(self.tempdir, prefix) if prefix else self.tempdir
@@ -67,12 +124,27 @@ class SandboxEnv:
             def convert_value(val):
                 return val
 
-        with open(os.path.join(base, name), 'wt') as conf:
-            conf.write(f"[{self.section_name}]\n")
-            for k, v in kwargs.items():
-                conf.write("{} = {}\n".format(
-                    k.replace('_', '-'), convert_value(v)
-                ))
+        lines = [f"[{self.section_name}]"]
+        lines.extend(
+            f"{k.replace('_', '-')} = {convert_value(v)}"
+            for k, v in kwargs.items()
+            if v is not None
+        )
+        pathlib.Path(base, name).write_text("\n".join(lines) + "\n")
+
+    def prepare(self, example_py=None, **kwargs):
+        """Set up the files for a test in one call.
+
+        Writes `example_py` (if given) as the `example.py` module of the
+        environment and, if there are any `kwargs`, passes them on to
+        `write_config`.
+
+        """
+        if example_py is not None:
+            with self.open('example.py', 'wt') as example:
+                example.write(example_py)
+        if kwargs:
+            self.write_config(**kwargs)
 
     def open(self, path, *args, **kwargs):
         """Open a file in the environment.
@@ -85,6 +157,21 @@ class SandboxEnv:
     def get_path(self, name, prefix=''):
         return os.path.join(self.tempdir, prefix, name)
 
+    def write_tree(self, files):
+        """Write several files to the environment at once.
+
+        `files` maps paths relative to the base of the environment (using
+        `/` as separator) to their contents. Missing parent directories are
+        created, each only once.
+
+        """
+        paths = {pathlib.Path(self.tempdir, path): text
+                 for path, text in files.items()}
+        for parent in {path.parent for path in paths}:
+            parent.mkdir(parents=True, exist_ok=True)
+        for path, text in paths.items():
+            path.write_text(text)
+
     def makedirs(self, path, *args, **kwargs):
         """Create a directory in a path relative to the environment base."""
         os.makedirs(os.path.join(self.tempdir, path), *args, **kwargs)
@@ -95,67 +182,194 @@ class SandboxEnv:
         If `target` is not None, will run pydocstyle on `target` instead of
         the environment base folder.
 
+        pydocstyle runs in the current process, by calling
+        `pydocstyle.cli.main` with its output captured, which saves the
+        interpreter startup and import time of a subprocess.
+
+        """
+        from unittest import mock
+
+        argv = [self.script_name, self._get_run_target(target),
+                *split_args(args)]
+        out, err = io.StringIO(), io.StringIO()
+        # The run sets up the shared logger to write to `out` and `err`.
+        handlers, level = utils.log.handlers[:], utils.log.level
+        with mock.patch.object(sys, 'argv', argv), \
+                redirect_stdout(out), redirect_stderr(err):
+            try:
+                cli.main()
+                code = 0
+            except SystemExit as exit_:
+                code = exit_.code
+            finally:
+                utils.log.handlers[:] = handlers
+                utils.log.setLevel(level)
+        return self.Result(out=out.getvalue(),
+                           err=err.getvalue(),
+                           code=code)
+
+    def invoke_script(self, args="", target=None):
+        """Run the installed pydocstyle script like `invoke` does.
+
+        This is slower than `invoke`, but runs pydocstyle in a fresh
+        interpreter, so it can't be affected by any state left behind in
+        the test process.
+
         """
-        run_target = self.tempdir if target is None else \
-            os.path.join(self.tempdir, target)
-
-        cmd = shlex.split("{} {} {}"
-                          .format(self.script_name, run_target, args),
-                          posix=False)
-        p = subprocess.Popen(cmd,
-                             stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE)
-        out, err = p.communicate()
-        return self.Result(out=out.decode('utf-8'),
-                           err=err.decode('utf-8'),
-                           code=p.returncode)
+        cmd = [self.script_name, self._get_run_target(target),
+               *split_args(args)]
+        p = subprocess.run(cmd,
+                           stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE,
+                           encoding='utf-8')
+        return self.Result(out=p.stdout, err=p.stderr, code=p.returncode)
+
+    def _get_run_target(self, target):
+        """Return the path to run pydocstyle on for `invoke`'s `target`."""
+        if target is None:
+            return self.tempdir
+        return os.path.join(self.tempdir, target)
 
     def __enter__(self):
-        self.tempdir = tempfile.mkdtemp()
-        # Make sure we won't be affected by other config files
-        self.write_config()
+        self.tempdir = tempfile.mkdtemp(dir=self.base_dir)
+        if self.base_dir is None:
+            # Make sure we won't be affected by other config files
+            self.write_config()
         return self
 
     def __exit__(self, *args, **kwargs):
-        shutil.rmtree(self.tempdir)
-        pass
+        if self.base_dir is None:
+            shutil.rmtree(self.tempdir)
 
 
-@pytest.fixture(scope="module")
-def install_package(request):
-    """Install the package in development mode for the tests.
+def _is_installed_from(src_dir):
+    """Return True iff pydocstyle is already installed from `src_dir`.
+
+    This is the case when the developer installed the package in development
+    mode, so there is no need to install it again for the tests.
 
-    This is so we can run the integration tests on the installed console
-    script.
     """
-    cwd = os.path.join(os.path.dirname(__file__), '..', '..')
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "-e", "."], cwd=cwd
-    )
-    yield
+    try:
+        metadata.distribution('pydocstyle')
+    except metadata.PackageNotFoundError:
+        return False
+    package_dir = pathlib.Path(pydocstyle.__file__).resolve().parent
+    return package_dir.parent == src_dir
+
+
+def _xdist_worker_id(config):
+    """Return the pytest-xdist worker id, or 'master' if not distributed."""
+    return getattr(config, 'workerinput', {}).get('workerid', 'master')
+
+
+def _install_to(target, cwd):
+    """Install the package in `cwd` into the `target` directory."""
     subprocess.check_call(
-        [sys.executable, "-m", "pip", "uninstall", "-y", "pydocstyle"], cwd=cwd
+        [sys.executable, "-m", "pip", "install", "--no-deps",
+         "--target", str(target), "."],
+        cwd=cwd,
     )
 
 
+@pytest.fixture(scope="session", autouse=True)
+def install_package(request, tmp_path_factory):
+    """Install the package into a temporary directory for the tests.
+
+    This is so we can run the integration tests on the installed console
+    script. The install is put on PATH and PYTHONPATH for the session only,
+    so there is nothing to uninstall afterwards. An existing development
+    install of this repository is used as is.
+
+    When distributed with pytest-xdist, the workers share a single install,
+    made by the first worker to get here.
+    """
+    cwd = os.path.join(os.path.dirname(__file__), '..', '..')
+    src_dir = pathlib.Path(cwd, 'src').resolve()
+    if _is_installed_from(src_dir):
+        yield
+        return
+
+    if _xdist_worker_id(request.config) == 'master':
+        target = tmp_path_factory.mktemp('pydocstyle_install')
+        _install_to(target, cwd)
+    else:
+        from filelock import FileLock
+
+        # The parent of the base temp directory is shared by all workers.
+        shared_dir = tmp_path_factory.getbasetemp().parent
+        target = shared_dir / 'pydocstyle_install'
+        with FileLock(str(shared_dir / 'pydocstyle_install.lock')):
+            if not target.exists():
+                _install_to(target, cwd)
+
+    scripts_dir = target / ('Scripts' if os.name == 'nt' else 'bin')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('PYTHONPATH', str(target), prepend=os.pathsep)
+        mp.setenv('PATH', str(scripts_dir), prepend=os.pathsep)
+        yield
+
+
+@pytest.fixture(scope="session")
+def _sandbox_root(request, tmp_path_factory):
+    """Return the directory in which all the test sandboxes are created.
+
+    Every pytest-xdist worker gets its own root, named after the worker and
+    its process id so concurrent sessions never share one. The root holds a
+    config file which stops the configuration discovery from going any
+    further up, so the sandboxes don't need their own. Sandboxes are not
+    removed one by one. A root on tmpfs is removed at the end of the
+    session, otherwise pytest cleans up its own temporary directories.
+    """
+    name = 'pydocstyle_sandbox_{}_{}_'.format(
+        _xdist_worker_id(request.config), os.getpid())
+    if SANDBOX_BASE_DIR is None:
+        root = str(tmp_path_factory.mktemp(name))
+    else:
+        root = tempfile.mkdtemp(prefix=name, dir=SANDBOX_BASE_DIR)
+
+    pathlib.Path(root, 'tox.ini').write_text('[pydocstyle]\ninherit = false\n')
+    yield root
+    if SANDBOX_BASE_DIR is not None:
+        shutil.rmtree(root)
+
+
+SANDBOX_SETTINGS = {
+    'ini': {
+        'section_name': 'pydocstyle',
+        'config_name': 'tox.ini',
+    },
+    'toml': {
+        'section_name': 'tool.pydocstyle',
+        'config_name': 'pyproject.toml',
+    },
+}
+
+
 @pytest.fixture(scope="function", params=['ini', 'toml'])
-def env(request):
-    """Add a testing environment to a test method."""
-    sandbox_settings = {
-        'ini': {
-            'section_name': 'pydocstyle',
-            'config_name': 'tox.ini',
-        },
-        'toml': {
-            'section_name': 'tool.pydocstyle',
-            'config_name': 'pyproject.toml',
-        },
-    }[request.param]
-    with SandboxEnv(**sandbox_settings) as test_env:
+def env(request, _sandbox_root):
+    """Add a testing environment to a test method.
+
+    The test runs once per supported config file format.
+    """
+    with SandboxEnv(base_dir=_sandbox_root,
+                    **SANDBOX_SETTINGS[request.param]) as test_env:
+        yield test_env
+
+
+@pytest.fixture(scope="function")
+def env_any(_sandbox_root):
+    """Add a testing environment to a test method.
+
+    For tests whose outcome does not depend on the config file format, so
+    they run only once, with a `tox.ini` file.
+    """
+    with SandboxEnv(base_dir=_sandbox_root,
+                    **SANDBOX_SETTINGS['ini']) as test_env:
         yield test_env
 
 
-pytestmark = pytest.mark.usefixtures("install_package")
+# An error is reported on two lines: the location and then the message.
+_ERROR_RE = re.compile(r'^.*?([^\\/\n]*?\.py).*\n\s*([^:\n]*):', re.MULTILINE)
 
 
 def parse_errors(err):
@@ -165,87 +379,96 @@ def parse_errors(err):
 
     """
     result = {}
-    py_ext = '.py'
-    lines = err.split('\n')
-    while lines:
-        curr_line = lines.pop(0)
-        filename = curr_line[:curr_line.find(py_ext) + len(py_ext)]
-        if lines:
-            err_line = lines.pop(0).strip()
-            err_code = err_line.split(':')[0]
-            basename = os.path.basename(filename)
-            result.setdefault(basename, set()).add(err_code)
-
+    for basename, err_code in _ERROR_RE.findall(err):
+        result.setdefault(basename, set()).add(err_code)
     return result
 
 
+def reusable_mock_open(read_data):
+    """Return a mock for `open` which can be used to read `read_data` again.
+
+    Unlike `mock.mock_open`, every call returns a fresh file object, so the
+    data is not exhausted after the first read.
+
+    """
+    from unittest import mock
+
+    return mock.MagicMock(side_effect=lambda *args, **kwargs:
+                          io.StringIO(read_data))
+
+
 def test_pep257_conformance():
     """Test that we conform to PEP 257."""
     base_dir = (pathlib.Path(__file__).parent / '..').resolve()
-    excluded = base_dir / 'tests' / 'test_cases'
-    src_files = (str(path) for path in base_dir.glob('**/*.py')
-                 if excluded not in path.parents)
+    excluded = str(base_dir / 'tests' / 'test_cases')
+
+    def src_files():
+        for root, dirs, filenames in os.walk(str(base_dir)):
+            # Prune the excluded directory instead of walking it.
+            dirs[:] = [d for d in dirs
+                       if os.path.join(root, d) != excluded]
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    yield os.path.join(root, filename)
 
     ignored = {'D104', 'D105'}
     select = violations.conventions.pep257 - ignored
-    errors = list(checker.check(src_files, select=select))
+    errors = list(checker.check(src_files(), select=select))
     assert errors == [], errors
 
 
+_BAD_DOCSTRING_FUNCTION = textwrap.dedent('''
+    def function_with_bad_docstring(foo):
+        """ does spacinwithout a period in the end
+        no blank line after one-liner is bad. Also this - """
+        return foo
+''')
+
+
 def test_ignore_list():
     """Test that `ignore`d errors are not reported in the API."""
-    function_to_check = textwrap.dedent('''
-        def function_with_bad_docstring(foo):
-            """ does spacinwithout a period in the end
-            no blank line after one-liner is bad. Also this - """
-            return foo
-    ''')
     expected_error_codes = {'D100', 'D400', 'D401', 'D205', 'D209', 'D210',
                             'D403', 'D415', 'D213'}
-    mock_open = mock.mock_open(read_data=function_to_check)
+    from unittest import mock
+
     from pydocstyle import checker
-    with mock.patch.object(
-            checker.tk, 'open', mock_open, create=True):
+    mock_open = reusable_mock_open(_BAD_DOCSTRING_FUNCTION)
+    with mock.patch.object(checker.tk, 'open', mock_open, create=True):
         # Passing a blank ignore here explicitly otherwise
         # checkers takes the pep257 ignores by default.
         errors = tuple(checker.check(['filepath'], ignore={}))
         error_codes = {error.code for error in errors}
         assert error_codes == expected_error_codes
 
-    # We need to recreate the mock, otherwise the read file is empty
-    mock_open = mock.mock_open(read_data=function_to_check)
-    with mock.patch.object(
-            checker.tk, 'open', mock_open, create=True):
         ignored = {'D100', 'D202', 'D213'}
         errors = tuple(checker.check(['filepath'], ignore=ignored))
         error_codes = {error.code for error in errors}
         assert error_codes == expected_error_codes - ignored
 
 
+_BAD_DOCSTRING_FUNCTION_NOQA = textwrap.dedent('''
+    def function_with_bad_docstring(foo):  # noqa: D400, D401, D403, D415
+        """ does spacinwithout a period in the end
+        no blank line after one-liner is bad. Also this - """
+        return foo
+''')
+
+
 def test_skip_errors():
     """Test that `ignore`d errors are not reported in the API."""
-    function_to_check = textwrap.dedent('''
-        def function_with_bad_docstring(foo):  # noqa: D400, D401, D403, D415
-            """ does spacinwithout a period in the end
-            no blank line after one-liner is bad. Also this - """
-            return foo
-    ''')
     expected_error_codes = {'D100', 'D205', 'D209', 'D210', 'D213'}
-    mock_open = mock.mock_open(read_data=function_to_check)
+    from unittest import mock
+
     from pydocstyle import checker
-    with mock.patch.object(
-            checker.tk, 'open', mock_open, create=True):
+    mock_open = reusable_mock_open(_BAD_DOCSTRING_FUNCTION_NOQA)
+    with mock.patch.object(checker.tk, 'open', mock_open, create=True):
         # Passing a blank ignore here explicitly otherwise
         # checkers takes the pep257 ignores by default.
         errors = tuple(checker.check(['filepath'], ignore={}))
         error_codes = {error.code for error in errors}
         assert error_codes == expected_error_codes
 
-    skipped_error_codes = {'D400', 'D401', 'D403', 'D415'}
-    # We need to recreate the mock, otherwise the read file is empty
-    mock_open = mock.mock_open(read_data=function_to_check)
-    with mock.patch.object(
-            checker.tk, 'open', mock_open, create=True):
+        skipped_error_codes = {'D400', 'D401', 'D403', 'D415'}
         errors = tuple(checker.check(['filepath'], ignore={},
                                      ignore_inline_noqa=True))
         error_codes = {error.code for error in errors}
@@ -279,58 +502,41 @@ def test_config_file(env):
     that we give the correct output.
 
     """
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
-
-    env.write_config(ignore='D100')
-    out, err, code = env.invoke()
-    assert code == 1
-    assert 'D100' not in out
-    assert 'D103' in out
-
-    env.write_config(ignore='')
-    out, err, code = env.invoke()
-    assert code == 1
-    assert 'D100' in out
-    assert 'D103' in out
-
-    env.write_config(ignore='D100,D103')
-    out, err, code = env.invoke()
-    assert code == 0
-    assert 'D100' not in out
-    assert 'D103' not in out
-
-    env.write_config(ignore='D10')
-    _, err, code = env.invoke()
-    assert code == 0
-    assert 'D100' not in err
-    assert 'D103' not in err
-
-
-def test_sectionless_config_file(env):
+    cases = [
+        # (ignore, expected reported error codes)
+        ('D100', {'D103'}),
+        # Same length as the previous config, which must not be reused.
+        ('D103', {'D100'}),
+        ('', {'D100', 'D103'}),
+        ('D100,D103', set()),
+        ('D10', set()),
+    ]
+
+    env.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING)
+    for ignore, expected in cases:
+        env.write_config(ignore=ignore)
+        out, err, code = env.invoke()
+        assert code == (1 if expected else 0), (ignore, out, err)
+        assert parse_errors(out).get('example.py', set()) == expected, ignore
+
+
+def test_sectionless_config_file(env_any):
     """Test that config files without a valid section name issue a warning."""
-    with env.open('config.ini', 'wt') as conf:
+    with env_any.open('config.ini', 'wt') as conf:
         conf.write('[pdcstl]')
         config_path = conf.name
 
-    _, err, code = env.invoke(f'--config={config_path}')
+    _, err, code = env_any.invoke(f'--config={config_path}')
     assert code == 0
     assert 'Configuration file does not contain a pydocstyle section' in err
 
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
+    env_any.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING)
 
-    with env.open('tox.ini', 'wt') as conf:
+    with env_any.open('tox.ini', 'wt') as conf:
         conf.write('[pdcstl]\n')
         conf.write('ignore = D100')
 
-    out, err, code = env.invoke()
+    out, err, code = env_any.invoke()
     assert code == 1
     assert 'D100' in out
     assert 'file does not contain a pydocstyle section' not in err
@@ -343,13 +549,7 @@ def test_sectionless_config_file(env):
 )
 def test_multiple_lined_config_file(env):
     """Test that .ini files with multi-lined entries are parsed correctly."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                "Doc string"
-                def foo():
-                    pass
-        """))
+    env.prepare(example_py=_EXAMPLE_CLASS_WITH_DOCSTRING)
 
     select_string = ('D100,\n'
                      '  #D103,\n'
@@ -371,15 +571,8 @@ def test_multiple_lined_config_file(env):
 )
 def test_accepts_select_error_code_list(env):
     """Test that .ini files with multi-lined entries are parsed correctly."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                "Doc string"
-                def foo():
-                    pass
-        """))
-
-    env.write_config(select=['D100', 'D204', 'D300'])
+    env.prepare(example_py=_EXAMPLE_CLASS_WITH_DOCSTRING,
+                select=['D100', 'D204', 'D300'])
 
     out, err, code = env.invoke()
     assert code == 1
@@ -396,11 +589,7 @@ def test_config_path(env):
     normal config file discovery is disabled.
 
     """
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
+    env.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING)
 
     # either my_config.ini or my_config.toml
     config_ext = env.config_name.split('.')[-1]
@@ -421,34 +610,31 @@ def test_config_path(env):
     assert 'D103' not in out
 
 
-def test_non_existent_config(env):
-    out, err, code = env.invoke('--config=does_not_exist')
+def test_non_existent_config(env_any):
+    out, err, code = env_any.invoke('--config=does_not_exist')
     assert code == 2
 
 
-def test_verbose(env):
+def test_verbose(env_any):
     """Test that passing --verbose prints more information."""
-    with env.open('example.py', 'wt') as example:
-        example.write('"""Module docstring."""\n')
+    env_any.prepare(example_py='"""Module docstring."""\n')
 
-    out, _, code = env.invoke()
+    # Use the console script here, so that at least one test runs
+    # pydocstyle in a fresh interpreter rather than in the test process.
+    out, _, code = env_any.invoke_script()
     assert code == 0
     assert 'example.py' not in out
 
-    out, _, code = env.invoke(args="--verbose")
+    out, _, code = env_any.invoke_script(args="--verbose")
     assert code == 0
     assert 'example.py' in out
 
 
-def test_count(env):
+def test_count(env_any):
     """Test that passing --count correctly prints the error num."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
+    env_any.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING)
 
-    out, err, code = env.invoke(args='--count')
+    out, err, code = env_any.invoke(args='--count')
     assert code == 1
     assert '2' in out
     # The error count should be in the last line of the output.
@@ -456,15 +642,11 @@ def test_count(env):
     assert '2' == out.split('\n')[-2].strip()
 
 
-def test_select_cli(env):
+def test_select_cli(env_any):
     """Test choosing error codes with `--select` in the CLI."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
+    env_any.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING)
 
-    out, err, code = env.invoke(args="--select=D100")
+    out, err, code = env_any.invoke(args="--select=D100")
     assert code == 1
     assert 'D100' in out
     assert 'D103' not in out
@@ -472,15 +654,7 @@ def test_select_cli(env):
 
 def test_select_config(env):
     """Test choosing error codes with `select` in the config file."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                "Doc string"
-                def foo():
-                    pass
-        """))
-
-    env.write_config(select="D100,D3")
+    env.prepare(example_py=_EXAMPLE_CLASS_WITH_DOCSTRING, select="D100,D3")
     out, err, code = env.invoke()
     assert code == 1
     assert 'D100' in out
@@ -488,18 +662,10 @@ def test_select_config(env):
     assert 'D103' not in out
 
 
-def test_add_select_cli(env):
+def test_add_select_cli(env_any):
     """Test choosing error codes with --add-select in the CLI."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                "Doc string"
-                def foo():
-                    pass
-        """))
-
-    env.write_config(select="D100")
-    out, err, code = env.invoke(args="--add-select=D204,D3")
+    env_any.prepare(example_py=_EXAMPLE_CLASS_WITH_DOCSTRING, select="D100")
+    out, err, code = env_any.invoke(args="--add-select=D204,D3")
     assert code == 1
     assert 'D100' in out
     assert 'D204' in out
@@ -507,35 +673,22 @@ def test_add_select_cli(env):
     assert 'D103' not in out
 
 
-def test_add_ignore_cli(env):
+def test_add_ignore_cli(env_any):
     """Test choosing error codes with --add-ignore in the CLI."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                def foo():
-                    pass
-        """))
-
-    env.write_config(select="D100,D101")
-    out, err, code = env.invoke(args="--add-ignore=D101")
+    env_any.prepare(example_py=_EXAMPLE_CLASS_NO_DOCSTRINGS,
+                    select="D100,D101")
+    out, err, code = env_any.invoke(args="--add-ignore=D101")
     assert code == 1
     assert 'D100' in out
     assert 'D101' not in out
     assert 'D103' not in out
 
 
-def test_wildcard_add_ignore_cli(env):
+def test_wildcard_add_ignore_cli(env_any):
     """Test choosing error codes with --add-ignore in the CLI."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                "Doc string"
-                def foo():
-                    pass
-        """))
-
-    env.write_config(select="D203,D300")
-    out, err, code = env.invoke(args="--add-ignore=D30")
+    env_any.prepare(example_py=_EXAMPLE_CLASS_WITH_DOCSTRING,
+                    select="D203,D300")
+    out, err, code = env_any.invoke(args="--add-ignore=D30")
     assert code == 1
     assert 'D203' in out
     assert 'D300' not in out
@@ -547,9 +700,8 @@ def test_wildcard_add_ignore_cli(env):
     'env', ['ini'], indirect=True
 )
 def test_ignores_whitespace_in_fixed_option_set(env):
-    with env.open('example.py', 'wt') as example:
-        example.write("class Foo(object):\n    'Doc string'")
-    env.write_config(ignore="D100,\n  # comment\n  D300")
+    env.prepare(example_py="class Foo(object):\n    'Doc string'",
+                ignore="D100,\n  # comment\n  D300")
     out, err, code = env.invoke()
     assert code == 1
     assert 'D300' not in out
@@ -562,27 +714,19 @@ def test_ignores_whitespace_in_fixed_option_set(env):
     'env', ['toml'], indirect=True
 )
 def test_accepts_ignore_error_code_list(env):
-    with env.open('example.py', 'wt') as example:
-        example.write("class Foo(object):\n    'Doc string'")
-    env.write_config(ignore=['D100', 'D300'])
+    env.prepare(example_py="class Foo(object):\n    'Doc string'",
+                ignore=['D100', 'D300'])
     out, err, code = env.invoke()
     assert code == 1
     assert 'D300' not in out
     assert err == ''
 
 
-def test_bad_wildcard_add_ignore_cli(env):
+def test_bad_wildcard_add_ignore_cli(env_any):
     """Test adding a non-existent error codes with --add-ignore."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo(object):
-                "Doc string"
-                def foo():
-                    pass
-        """))
-
-    env.write_config(select="D203,D300")
-    out, err, code = env.invoke(args="--add-ignore=D3004")
+    env_any.prepare(example_py=_EXAMPLE_CLASS_WITH_DOCSTRING,
+                    select="D203,D300")
+    out, err, code = env_any.invoke(args="--add-ignore=D3004")
     assert code == 1
     assert 'D203' in out
     assert 'D300' in out
@@ -591,247 +735,200 @@ def test_bad_wildcard_add_ignore_cli(env):
             in err)
 
 
-def test_overload_function(env):
-    """Functions decorated with @overload trigger D418 error."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
+_OVERLOAD_FUNCTION = textwrap.dedent('''\
+    from typing import overload
 
 
-        @overload
-        def overloaded_func(a: int) -> str:
-            ...
+    @overload
+    def overloaded_func(a: int) -> str:
+        ...
 
 
-        @overload
-        def overloaded_func(a: str) -> str:
-            """Foo bar documentation."""
-            ...
+    @overload
+    def overloaded_func(a: str) -> str:
+        """Foo bar documentation."""
+        ...
 
 
-        def overloaded_func(a):
-            """Foo bar documentation."""
-            return str(a)
+    def overloaded_func(a):
+        """Foo bar documentation."""
+        return str(a)
 
-        '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 1
-    assert 'D418' in out
-    assert 'D103' not in out
+''')
+
+_OVERLOAD_ASYNC_FUNCTION = textwrap.dedent('''\
+    from typing import overload
 
 
-def test_overload_async_function(env):
-    """Async functions decorated with @overload trigger D418 error."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
+    @overload
+    async def overloaded_func(a: int) -> str:
+        ...
 
 
+    @overload
+    async def overloaded_func(a: str) -> str:
+        """Foo bar documentation."""
+        ...
+
+
+    async def overloaded_func(a):
+        """Foo bar documentation."""
+        return str(a)
+
+''')
+
+_OVERLOAD_METHOD = textwrap.dedent('''\
+    from typing import overload
+
+    class ClassWithMethods:
         @overload
-        async def overloaded_func(a: int) -> str:
+        def overloaded_method(a: int) -> str:
             ...
 
 
         @overload
-        async def overloaded_func(a: str) -> str:
+        def overloaded_method(a: str) -> str:
             """Foo bar documentation."""
             ...
 
 
-        async def overloaded_func(a):
+        def overloaded_method(a):
             """Foo bar documentation."""
             return str(a)
 
-        '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 1
-    assert 'D418' in out
-    assert 'D103' not in out
+''')
 
+_OVERLOAD_NESTED_FUNCTION = textwrap.dedent('''\
+    from typing import overload
 
-def test_overload_method(env):
-    """Methods decorated with @overload trigger D418 error."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
+    def function_with_nesting():
+        """Valid docstring in public function."""
+        @overload
+        def overloaded_func(a: int) -> str:
+            ...
 
-        class ClassWithMethods:
-            @overload
-            def overloaded_method(a: int) -> str:
-                ...
 
+        @overload
+        def overloaded_func(a: str) -> str:
+            """Foo bar documentation."""
+            ...
 
-            @overload
-            def overloaded_method(a: str) -> str:
-                """Foo bar documentation."""
-                ...
 
+        def overloaded_func(a):
+            """Foo bar documentation."""
+            return str(a)
+''')
 
-            def overloaded_method(a):
-                """Foo bar documentation."""
-                return str(a)
+_OVERLOAD_FUNCTION_VALID = textwrap.dedent('''\
+    from typing import overload
 
-        '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 1
-    assert 'D418' in out
-    assert 'D102' not in out
-    assert 'D103' not in out
 
+    @overload
+    def overloaded_func(a: int) -> str:
+        ...
 
-def test_overload_method_valid(env):
-    """Valid case for overload decorated Methods.
 
-    This shouldn't throw any errors.
-    """
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
+    @overload
+    def overloaded_func(a: str) -> str:
+        ...
 
-        class ClassWithMethods:
-            """Valid docstring in public Class."""
 
-            @overload
-            def overloaded_method(a: int) -> str:
-                ...
+    def overloaded_func(a):
+        """Foo bar documentation."""
+        return str(a)
 
+''')
 
-            @overload
-            def overloaded_method(a: str) -> str:
-                ...
+_OVERLOAD_ASYNC_FUNCTION_VALID = textwrap.dedent('''\
+    from typing import overload
 
 
-            def overloaded_method(a):
-                """Foo bar documentation."""
-                return str(a)
+    @overload
+    async def overloaded_func(a: int) -> str:
+        ...
 
-        '''))
-    env.write_config(ignore="D100, D203")
-    out, err, code = env.invoke()
-    assert code == 0
 
+    @overload
+    async def overloaded_func(a: str) -> str:
+        ...
 
-def test_overload_function_valid(env):
-    """Valid case for overload decorated functions.
 
-    This shouldn't throw any errors.
-    """
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
+    async def overloaded_func(a):
+        """Foo bar documentation."""
+        return str(a)
+
+''')
+
+_OVERLOAD_METHOD_VALID = textwrap.dedent('''\
+    from typing import overload
 
+    class ClassWithMethods:
+        """Valid docstring in public Class."""
 
         @overload
-        def overloaded_func(a: int) -> str:
+        def overloaded_method(a: int) -> str:
             ...
 
 
         @overload
-        def overloaded_func(a: str) -> str:
+        def overloaded_method(a: str) -> str:
             ...
 
 
-        def overloaded_func(a):
+        def overloaded_method(a):
             """Foo bar documentation."""
             return str(a)
 
-        '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 0
-
-
-def test_overload_async_function_valid(env):
-    """Valid case for overload decorated async functions.
-
-    This shouldn't throw any errors.
-    """
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
+''')
 
+_OVERLOAD_NESTED_FUNCTION_VALID = textwrap.dedent('''\
+    from typing import overload
 
+    def function_with_nesting():
+        """Add a docstring to a function."""
         @overload
-        async def overloaded_func(a: int) -> str:
+        def overloaded_func(a: int) -> str:
             ...
 
 
         @overload
-        async def overloaded_func(a: str) -> str:
+        def overloaded_func(a: str) -> str:
             ...
 
 
-        async def overloaded_func(a):
+        def overloaded_func(a):
             """Foo bar documentation."""
             return str(a)
-
-        '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 0
-
-
-def test_overload_nested_function(env):
-    """Nested functions decorated with @overload trigger D418 error."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
-
-        def function_with_nesting():
-            """Valid docstring in public function."""
-            @overload
-            def overloaded_func(a: int) -> str:
-                ...
-
-
-            @overload
-            def overloaded_func(a: str) -> str:
-                """Foo bar documentation."""
-                ...
-
-
-            def overloaded_func(a):
-                """Foo bar documentation."""
-                return str(a)
-            '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 1
-    assert 'D418' in out
-    assert 'D103' not in out
-
-
-def test_overload_nested_function_valid(env):
-    """Valid case for overload decorated nested functions.
-
-    This shouldn't throw any errors.
+''')
+
+
+@pytest.mark.parametrize('source, expects_d418', [
+    pytest.param(_OVERLOAD_FUNCTION, True, id='function'),
+    pytest.param(_OVERLOAD_ASYNC_FUNCTION, True, id='async_function'),
+    pytest.param(_OVERLOAD_METHOD, True, id='method'),
+    pytest.param(_OVERLOAD_NESTED_FUNCTION, True, id='nested_function'),
+    pytest.param(_OVERLOAD_FUNCTION_VALID, False, id='function_valid'),
+    pytest.param(_OVERLOAD_ASYNC_FUNCTION_VALID, False,
+                 id='async_function_valid'),
+    pytest.param(_OVERLOAD_METHOD_VALID, False, id='method_valid'),
+    pytest.param(_OVERLOAD_NESTED_FUNCTION_VALID, False,
+                 id='nested_function_valid'),
+])
+def test_overload(env_any, source, expects_d418):
+    """Test functions and methods decorated with @overload.
+
+    Overloads which have a docstring trigger D418 error, valid cases
+    shouldn't throw any errors.
     """
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''\
-        from typing import overload
-
-        def function_with_nesting():
-            """Add a docstring to a function."""
-            @overload
-            def overloaded_func(a: int) -> str:
-                ...
-
-
-            @overload
-            def overloaded_func(a: str) -> str:
-                ...
-
-
-            def overloaded_func(a):
-                """Foo bar documentation."""
-                return str(a)
-            '''))
-    env.write_config(ignore="D100")
-    out, err, code = env.invoke()
-    assert code == 0
+    env_any.prepare(example_py=source, ignore="D100, D203")
+    out, err, code = env_any.invoke()
+    if expects_d418:
+        assert code == 1
+        assert 'D418' in out
+    else:
+        assert code == 0, out
+    assert 'D102' not in out
+    assert 'D103' not in out
 
 
 def test_conflicting_select_ignore_config(env):
@@ -858,19 +955,19 @@ def test_conflicting_ignore_convention_config(env):
     assert 'mutually exclusive' in err
 
 
-def test_missing_docstring_in_package(env):
+def test_missing_docstring_in_package(env_any):
     """Make sure __init__.py files are treated as packages."""
-    with env.open('__init__.py', 'wt') as init:
+    with env_any.open('__init__.py', 'wt') as init:
         pass  # an empty package file
-    out, err, code = env.invoke()
+    out, err, code = env_any.invoke()
     assert code == 1
     assert 'D100' not in out  # shouldn't be treated as a module
     assert 'D104' in out  # missing docstring in package
 
 
-def test_illegal_convention(env):
+def test_illegal_convention(env_any):
     """Test that illegal convention names are dealt with properly."""
-    _, err, code = env.invoke('--convention=illegal_conv')
+    _, err, code = env_any.invoke('--convention=illegal_conv')
     assert code == 2, err
     assert "Illegal convention 'illegal_conv'." in err
     assert 'Possible conventions' in err
@@ -878,40 +975,24 @@ def test_illegal_convention(env):
     assert 'numpy' in err
 
 
-def test_empty_select_cli(env):
+def test_empty_select_cli(env_any):
     """Test excluding all error codes with `--select=` in the CLI."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
+    env_any.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING)
 
-    _, _, code = env.invoke(args="--select=")
+    _, _, code = env_any.invoke(args="--select=")
     assert code == 0
 
 
 def test_empty_select_config(env):
     """Test excluding all error codes with `select=` in the config file."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
-
-    env.write_config(select="")
+    env.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING, select="")
     _, _, code = env.invoke()
     assert code == 0
 
 
 def test_empty_select_with_added_error(env):
     """Test excluding all errors but one."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
-
-    env.write_config(select="")
+    env.prepare(example_py=_EXAMPLE_FUNC_NO_DOCSTRING, select="")
     out, err, code = env.invoke(args="--add-select=D100")
     assert code == 1
     assert 'D100' in out
@@ -919,33 +1000,33 @@ def test_empty_select_with_added_error(env):
     assert 'D103' not in out
 
 
-def test_pep257_convention(env):
-    """Test that the 'pep257' convention options has the correct errors."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''
-            class Foo(object):
+_PEP257_CONVENTION_EXAMPLE = textwrap.dedent('''
+    class Foo(object):
+
 
+        """Docstring for this class"""
+        def foo():
+            pass
 
-                """Docstring for this class"""
-                def foo():
-                    pass
 
+    # Original PEP-257 example from -
+    # https://www.python.org/dev/peps/pep-0257/
+    def complex(real=0.0, imag=0.0):
+        """Form a complex number.
 
-            # Original PEP-257 example from -
-            # https://www.python.org/dev/peps/pep-0257/
-            def complex(real=0.0, imag=0.0):
-                """Form a complex number.
+        Keyword arguments:
+        real -- the real part (default 0.0)
+        imag -- the imaginary part (default 0.0)
+        """
+        if imag == 0.0 and real == 0.0:
+            return complex_zero
+''')
 
-                Keyword arguments:
-                real -- the real part (default 0.0)
-                imag -- the imaginary part (default 0.0)
-                """
-                if imag == 0.0 and real == 0.0:
-                    return complex_zero
-        '''))
 
-    env.write_config(convention="pep257")
-    out, err, code = env.invoke()
+def test_pep257_convention(env_any):
+    """Test that the 'pep257' convention options has the correct errors."""
+    env_any.prepare(example_py=_PEP257_CONVENTION_EXAMPLE, convention="pep257")
+    out, err, code = env_any.invoke()
     assert code == 1
     assert 'D100' in out
     assert 'D211' in out
@@ -955,22 +1036,22 @@ def test_pep257_convention(env):
     assert 'D413' not in out
 
 
-def test_numpy_convention(env):
+_NUMPY_CONVENTION_EXAMPLE = textwrap.dedent('''
+    class Foo(object):
+        """Docstring for this class.
+
+        returns
+         ------
+        """
+        def __init__(self):
+            pass
+''')
+
+
+def test_numpy_convention(env_any):
     """Test that the 'numpy' convention options has the correct errors."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''
-            class Foo(object):
-                """Docstring for this class.
-
-                returns
-                 ------
-                """
-                def __init__(self):
-                    pass
-        '''))
-
-    env.write_config(convention="numpy")
-    out, err, code = env.invoke()
+    env_any.prepare(example_py=_NUMPY_CONVENTION_EXAMPLE, convention="numpy")
+    out, err, code = env_any.invoke()
     assert code == 1
     assert 'D107' not in out
     assert 'D213' not in out
@@ -982,34 +1063,34 @@ def test_numpy_convention(env):
     assert 'D413' not in out
 
 
-def test_google_convention(env):
-    """Test that the 'google' convention options has the correct errors."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent('''
-            def func(num1, num2, num_three=0):
-                """Docstring for this function.
+_GOOGLE_CONVENTION_EXAMPLE = textwrap.dedent('''
+    def func(num1, num2, num_three=0):
+        """Docstring for this function.
+
+        Args:
+            num1 (int): Number 1.
+            num2: Number 2.
+        """
 
-                Args:
-                    num1 (int): Number 1.
-                    num2: Number 2.
-                """
 
+    class Foo(object):
+        """Docstring for this class.
 
-            class Foo(object):
-                """Docstring for this class.
+        Attributes:
 
-                Attributes:
+            test: Test
 
-                    test: Test
+        returns:
+        """
+        def __init__(self):
+            pass
+''')
 
-                returns:
-                """
-                def __init__(self):
-                    pass
-        '''))
 
-    env.write_config(convention="google")
-    out, err, code = env.invoke()
+def test_google_convention(env_any):
+    """Test that the 'google' convention options has the correct errors."""
+    env_any.prepare(example_py=_GOOGLE_CONVENTION_EXAMPLE, convention="google")
+    out, err, code = env_any.invoke()
     assert code == 1
     assert 'D107' in out
     assert 'D213' not in out
@@ -1049,11 +1130,9 @@ def test_config_file_inheritance(env):
     env.write_config(select='')
     env.write_config(prefix='A', inherit=False)
 
-    with env.open(os.path.join('A', 'test.py'), 'wt') as test:
-        test.write(textwrap.dedent("""\
-            def bar():
-                pass
-        """))
+    env.write_tree({
+        'A/test.py': _EXAMPLE_FUNC_NO_DOCSTRING,
+    })
 
     out, err, code = env.invoke()
 
@@ -1083,16 +1162,12 @@ def test_config_file_cumulative_add_ignores(env):
     env.write_config(select='D100,D103', add_ignore='D100')
     env.write_config(prefix='A', add_ignore='D103')
 
-    test_content = textwrap.dedent("""\
-        def foo():
-            pass
-    """)
-
-    with env.open('base.py', 'wt') as test:
-        test.write(test_content)
+    test_content = _EXAMPLE_FUNC_NO_DOCSTRING
 
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(test_content)
+    env.write_tree({
+        'base.py': test_content,
+        'A/a.py': test_content,
+    })
 
     out, err, code = env.invoke()
 
@@ -1126,16 +1201,12 @@ def test_config_file_cumulative_add_select(env):
     env.write_config(select='', add_select='D100')
     env.write_config(prefix='A', add_select='D103')
 
-    test_content = textwrap.dedent("""\
-        def foo():
-            pass
-    """)
+    test_content = _EXAMPLE_FUNC_NO_DOCSTRING
 
-    with env.open('base.py', 'wt') as test:
-        test.write(test_content)
-
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(test_content)
+    env.write_tree({
+        'base.py': test_content,
+        'A/a.py': test_content,
+    })
 
     out, err, code = env.invoke()
 
@@ -1171,11 +1242,10 @@ def test_config_file_convention_overrides_select(env):
 
     test_content = ""
 
-    with env.open('base.py', 'wt') as test:
-        test.write(test_content)
-
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(test_content)
+    env.write_tree({
+        'base.py': test_content,
+        'A/a.py': test_content,
+    })
 
     out, err, code = env.invoke()
 
@@ -1204,15 +1274,10 @@ def test_cli_overrides_config_file(env):
     """
     env.write_config(select='D103', match_dir='foo')
 
-    with env.open('base.py', 'wt') as test:
-        test.write("")
-
-    env.makedirs('A')
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
+    env.write_tree({
+        'base.py': "",
+        'A/a.py': _EXAMPLE_FUNC_NO_DOCSTRING,
+    })
 
     out, err, code = env.invoke(args="--convention=pep257")
 
@@ -1244,14 +1309,10 @@ def test_cli_match_overrides_config_file(env):
     env.write_config(match_dir='foo')
     env.write_config(prefix='A', match='bar.py')
 
-    with env.open('base.py', 'wt') as test:
-        test.write(textwrap.dedent("""\
-            def foo():
-                pass
-        """))
-
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write("")
+    env.write_tree({
+        'base.py': _EXAMPLE_FUNC_NO_DOCSTRING,
+        'A/a.py': "",
+    })
 
     out, err, code = env.invoke(args="--match=a.py --match-dir=A")
 
@@ -1283,16 +1344,12 @@ def test_config_file_convention_overrides_ignore(env):
     env.write_config(ignore='D100,D103')
     env.write_config(prefix='A', convention='pep257')
 
-    test_content = textwrap.dedent("""\
-        def foo():
-            pass
-    """)
-
-    with env.open('base.py', 'wt') as test:
-        test.write(test_content)
+    test_content = _EXAMPLE_FUNC_NO_DOCSTRING
 
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(test_content)
+    env.write_tree({
+        'base.py': test_content,
+        'A/a.py': test_content,
+    })
 
     out, err, code = env.invoke()
 
@@ -1324,17 +1381,12 @@ def test_config_file_ignore_overrides_select(env):
     env.write_config(select='D100')
     env.write_config(prefix='A', ignore='D102')
 
-    test_content = textwrap.dedent("""\
-        class Foo(object):
-            def bar():
-                pass
-    """)
+    test_content = _EXAMPLE_CLASS_NO_DOCSTRINGS
 
-    with env.open('base.py', 'wt') as test:
-        test.write(test_content)
-
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(test_content)
+    env.write_tree({
+        'base.py': test_content,
+        'A/a.py': test_content,
+    })
 
     out, err, code = env.invoke()
 
@@ -1376,21 +1428,13 @@ def test_config_file_nearest_to_checked_file(env):
     env.write_config(convention='pep257', add_ignore='D100')
     env.write_config(prefix='B', add_ignore='D101')
 
-    test_content = textwrap.dedent("""\
-        class Foo(object):
-            def bar():
-                pass
-    """)
-
-    with env.open('base.py', 'wt') as test:
-        test.write(test_content)
+    test_content = _EXAMPLE_CLASS_NO_DOCSTRINGS
 
-    env.makedirs('A')
-    with env.open(os.path.join('A', 'a.py'), 'wt') as test:
-        test.write(test_content)
-
-    with env.open(os.path.join('B', 'b.py'), 'wt') as test:
-        test.write(test_content)
+    env.write_tree({
+        'base.py': test_content,
+        'A/a.py': test_content,
+        'B/b.py': test_content,
+    })
 
     out, err, code = env.invoke()
 
@@ -1433,60 +1477,68 @@ def test_config_file_nearest_match_re(env):
     env.write_config(prefix='A', match_dir='C')
     env.write_config(prefix=os.path.join('A', 'C'), match='bla.py')
 
-    content = textwrap.dedent("""\
-        def foo():
-            pass
-    """)
+    content = _EXAMPLE_FUNC_NO_DOCSTRING
 
-    env.makedirs(os.path.join('A', 'B'))
-    with env.open(os.path.join('A', 'B', 'b.py'), 'wt') as test:
-        test.write(content)
-
-    with env.open(os.path.join('A', 'C', 'c.py'), 'wt') as test:
-        test.write(content)
-
-    with env.open(os.path.join('A', 'C', 'bla.py'), 'wt') as test:
-        test.write('')
+    env.write_tree({
+        'A/B/b.py': content,
+        'A/C/c.py': content,
+        'A/C/bla.py': '',
+    })
 
     _, _, code = env.invoke()
 
     assert code == 0
 
 
-def test_syntax_error_multiple_files(env):
+def test_syntax_error_multiple_files(env_any):
     """Test that a syntax error in a file doesn't prevent further checking."""
-    for filename in ('first.py', 'second.py'):
-        with env.open(filename, 'wt') as fobj:
-            fobj.write("[")
+    env_any.write_tree({'first.py': "[", 'second.py': "["})
 
-    out, err, code = env.invoke(args="-v")
+    out, err, code = env_any.invoke(args="-v")
     assert code == 1
     assert 'first.py: Cannot parse file' in err
     assert 'second.py: Cannot parse file' in err
 
 
-def test_indented_function(env):
+@pytest.mark.skipif(not hasattr(os, 'symlink') or os.name == 'nt',
+                    reason='needs symlinks')
+def test_symlinks_are_not_followed(env_any):
+    """Test that symlinked dirs are skipped and symlink loops are ignored."""
+    env_any.write_tree({'A/a.py': _EXAMPLE_FUNC_NO_DOCSTRING})
+    os.symlink('A', env_any.get_path('link'))
+    os.symlink('loop', env_any.get_path('loop'))
+
+    out, err, code = env_any.invoke()
+    assert code == 1, err
+    assert parse_errors(out) == {'a.py': {'D100', 'D103'}}
+    assert 'link' not in out
+
+
+_NESTED_FUNCTION_EXAMPLE = textwrap.dedent('''\
+    def foo():
+        def bar(a):
+            """A docstring
+
+            Args:
+                a : An argument.
+            """
+            pass
+''')
+
+
+def test_indented_function(env_any):
     """Test that nested functions do not cause IndentationError."""
-    env.write_config(ignore='D')
-    with env.open("test.py", 'wt') as fobj:
-        fobj.write(textwrap.dedent('''\
-            def foo():
-                def bar(a):
-                    """A docstring
-
-                    Args:
-                        a : An argument.
-                    """
-                    pass
-        '''))
-    out, err, code = env.invoke(args="-v")
+    env_any.write_config(ignore='D')
+    with env_any.open("test.py", 'wt') as fobj:
+        fobj.write(_NESTED_FUNCTION_EXAMPLE)
+    out, err, code = env_any.invoke(args="-v")
     assert code == 0
     assert "IndentationError: unexpected indent" not in err
 
 
-def test_only_comment_file(env):
+def test_only_comment_file(env_any):
     """Test that file with only comments does only cause D100."""
-    with env.open('comments.py', 'wt') as comments:
+    with env_any.open('comments.py', 'wt') as comments:
         comments.write(
             '#!/usr/bin/env python3\n'
             '# -*- coding: utf-8 -*-\n'
@@ -1494,7 +1546,7 @@ def test_only_comment_file(env):
             '# Just another useless comment\n'
         )
 
-    out, _, code = env.invoke()
+    out, _, code = env_any.invoke()
     assert 'D100' in out
     out = out.replace('D100', '')
     for err in {'D1', 'D2', 'D3', 'D4'}:
@@ -1502,9 +1554,9 @@ def test_only_comment_file(env):
     assert code == 1
 
 
-def test_comment_plus_docstring_file(env):
+def test_comment_plus_docstring_file(env_any):
     """Test that file with comments and docstring does not cause errors."""
-    with env.open('comments_plus.py', 'wt') as comments_plus:
+    with env_any.open('comments_plus.py', 'wt') as comments_plus:
         comments_plus.write(
             '#!/usr/bin/env python3\n'
             '# -*- coding: utf-8 -*-\n'
@@ -1513,14 +1565,14 @@ def test_comment_plus_docstring_file(env):
             '"""Module docstring."""\n'
         )
 
-    out, _, code = env.invoke()
+    out, _, code = env_any.invoke()
     assert '' == out
     assert code == 0
 
 
-def test_only_comment_with_noqa_file(env):
+def test_only_comment_with_noqa_file(env_any):
     """Test that file with noqa and only comments does not cause errors."""
-    with env.open('comments.py', 'wt') as comments:
+    with env_any.open('comments.py', 'wt') as comments:
         comments.write(
             '#!/usr/bin/env python3\n'
             '# -*- coding: utf-8 -*-\n'
@@ -1529,14 +1581,14 @@ def test_only_comment_with_noqa_file(env):
             '# noqa: D100\n'
         )
 
-    out, _, code = env.invoke()
+    out, _, code = env_any.invoke()
     assert 'D100' not in out
     assert code == 0
 
 
-def test_comment_with_noqa_plus_docstring_file(env):
+def test_comment_with_noqa_plus_docstring_file(env_any):
     """Test that file with comments, noqa, docstring does not cause errors."""
-    with env.open('comments_plus.py', 'wt') as comments_plus:
+    with env_any.open('comments_plus.py', 'wt') as comments_plus:
         comments_plus.write(
             '#!/usr/bin/env python3\n'
             '# -*- coding: utf-8 -*-\n'
@@ -1546,21 +1598,22 @@ def test_comment_with_noqa_plus_docstring_file(env):
             '"""Module docstring without period"""\n'
         )
 
-    out, _, code = env.invoke()
+    out, _, code = env_any.invoke()
     assert '' == out
     assert code == 0
 
 
+_SELF_ONLY_INIT_EXAMPLE = textwrap.dedent("""\
+    class Foo:
+        def __init__(self):
+            pass
+""")
+
+
 def test_ignore_self_only_init(env):
     """Test that ignore_self_only_init works ignores __init__ with only self."""
-    with env.open('example.py', 'wt') as example:
-        example.write(textwrap.dedent("""\
-            class Foo:
-                def __init__(self):
-                    pass
-        """))
-
-    env.write_config(ignore_self_only_init=True, select="D107")
+    env.prepare(example_py=_SELF_ONLY_INIT_EXAMPLE,
+                ignore_self_only_init=True, select="D107")
     out, err, code = env.invoke()
     assert '' == out
     assert code == 0